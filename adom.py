@@ -10,16 +10,12 @@ import termios
 import tty
 import fcntl
 import struct
-import shutil
 import re
 from datetime import datetime
-from time import time
 import traceback
 import curses
 
-# Configure logging with timestamp in the filename
-log_file_path = 'adom_log_{}.log'.format(datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
-logging.basicConfig(filename=log_file_path, level=logging.DEBUG)
+_logger = logging.getLogger(__name__)
 
 def set_window_size(fd, rows, cols):
     """Set the window size of the terminal."""
@@ -28,25 +24,60 @@ def set_window_size(fd, rows, cols):
 
 def extract_game_name(file_path):
     """Extract the actual game name from the saved game file."""
-    with open(file_path, 'rb') as file:
-        file.seek(0x10)  # Go to the offset where the game name is stored
-        game_name = file.read(12).split(b'\x00', 1)[0].decode('utf-8')  # Read the name and split by null terminator
-    return game_name
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        name = os.pread(fd, 12, 0x10)  # The game name is stored at offset 0x10
+    finally:
+        os.close(fd)
+    return name.split(b'\x00', 1)[0].decode('utf-8')  # Split by null terminator
+
+_FICLONE = 0x40049409  # Linux ioctl that reflinks src's data into dst
+
+def copy_file(src_path, dst_path):
+    """Copy a file inside the kernel, as a CoW reflink where the filesystem allows it."""
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return  # Reflinked; no data was moved at all
+        except OSError:
+            pass  # Not a CoW filesystem; fall back to sendfile
+        size = os.fstat(src.fileno()).st_size
+        offset = 0
+        while offset < size:
+            offset += os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+
+def write_all(fd, data):
+    """Write the whole of data to fd, looping over short writes and waiting
+    for writability when a non-blocking fd reports EAGAIN."""
+    view = memoryview(data)
+    while len(view):
+        try:
+            written = os.write(fd, view)
+        except BlockingIOError:
+            select.select([], [fd], [])
+            continue
+        view = view[written:]
 
 def list_saved_games(backup_dir_base, saved_games_dir):
     """List the saved games and their corresponding modification time."""
     mtime = dict()
 
-    saved_games = [f for f in os.listdir(saved_games_dir) if os.path.isfile(os.path.join(saved_games_dir, f)) and f.endswith('.svg')]
+    saved_games = []
 
-    for game in saved_games:
-        mtime[game] = os.path.getmtime(os.path.join(saved_games_dir, game))
+    with os.scandir(saved_games_dir) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False) and entry.name.endswith('.svg'):
+                saved_games.append(entry.name)
+                mtime[entry.name] = entry.stat(follow_symlinks=False).st_mtime
 
     if os.path.isdir(backup_dir_base):
-        for game in os.listdir(backup_dir_base):
-            if game not in saved_games:
-                saved_games.append(game)
-                mtime[game] = os.path.getmtime(os.path.join(backup_dir_base, game))
+        with os.scandir(backup_dir_base) as it:
+            for entry in it:
+                # mtime already holds every name from the save directory, so
+                # this membership test is a hash probe, not a list scan
+                if entry.name not in mtime:
+                    saved_games.append(entry.name)
+                    mtime[entry.name] = entry.stat(follow_symlinks=False).st_mtime
 
     saved_games.sort(key=lambda x: mtime[x], reverse=True)
 
@@ -100,14 +131,146 @@ def display_menu_and_get_choice(backup_dir_base, saved_games_dir):
 
     return curses.wrapper(curses_wrapper)
 
-TIMEOUT = 0.05  # Define a constant for the user input timeout
-SELECT_TIMEOUT = 0.1  # Define a constant for the select timeout
+SELECT_TIMEOUT = 0.1  # Define a constant for the poll timeout
+
+# Preallocated read buffers so the relay loop does not allocate a fresh
+# bytes object for every read; os.readv fills them in place
+_PTY_READ_BUF = memoryview(bytearray(65536))
+_STDIN_READ_BUF = memoryview(bytearray(1024))
+
+# Precompiled patterns for the output callback; compiling them per call is wasted work.
+# They operate on bytes so the buffer never has to go through the UTF-8 codec.
+_EXIT_KEY_RE = re.compile(rb'-+ \[\+\-\] Page up/down -- \[\*\_\] Line up/down -- \[(\w)\] Exit -+')
+_PRESS_SPACE_RE = re.compile(rb'\[Press SPACE to continue\]')
+_CREDITS_QUIT_RE = re.compile(rb'\[c\] read the credits or\[q\] quit the game\?Your choice:')
+
+# The always-active prompts, combined so one scan of the buffer finds
+# whichever is on screen; the handler dispatches on lastgroup
+_PROMPT_RE = re.compile(
+    rb'(?P<save>-+Really save the game\? \[y\/N\])'
+    rb'|(?P<quit>Really quit the game\? \[y\/N\])'
+    rb'|(?P<pool>You see a \S+ pool\.)'
+    rb'|(?P<drink>-+Do you want to drink from the pool\? \[Y\/n\])'
+)
+# The three screens seen while quitting, folded into one alternation and
+# told apart by the start of whatever matched
+_QUIT_SEQ_RE = re.compile(rb'-- \[Zz \] Exit #+|\[e\] exit to the main menu or  \[q\] quit the game\?  Your choice:|\(more\)')
+_DRINK_PROMPT_RE = re.compile(rb'-+Do you want to drink from the pool\? \[Y\/n\]')
+
+# Pool drinking outcomes. One compiled alternation per category turns the
+# per-message substring loops into a single left-to-right scan each.
+_GOOD_MESSAGES = (
+    b"You swallow hard", b"You feel hot-headed",
+    b"You feel bold at the thought of danger", b"You feel very lucky",
+    b"You feel cool", b"You feel lucky", b"You are moved by the sheer pleasure of this sip of fluid",
+    b"You feel flexible", b"Your digestion calms down", b"Your eyes tingle for a second",
+    b"You hear a voice calling you 'Iceberg'", b"You feel totally awake",
+    b"You feel very controlled", b"Your looks improve", b"You feel very self-confident",
+    b"Your movements are getting swifter", b"You feel studious",
+    b"You feel more in touch with the world", b"Your senses sharpen",
+    b"Your muscles feel stronger", b"Your health increases", b"Your will seems inflexible",
+    b"You feel great about your", b"You feel much better",
+    b"You feel younger!", b"You suddenly remember your early youth", 
+    b"You feel slightly strengthened", b"Your wounds no longer bleed", 
+    b"Your blood seems to cool down", b"You suddenly are visible again",
+    b"No effect, as far as you notice", b"You feel steady", b"You feel relieved", 
+
+)
+
+_BAD_MESSAGES = (
+    b"The pool suddenly dries up.", b"You taste bitter bile in your mouth", b"You shiver",
+    b"You feel like an endangered species", b"You become depressive",
+    b"You continue the trip on the road to nowhere", b"You feel elated", b"You sweat",
+    b"Your outfit suddenly looks much cleaner", b"You suddenly can see yourself",
+    b"You feel dizzy for some seconds", b"Suddenly you are gone", b"You feel translucent",
+    b"You feel on air", b"You suddenly are visible again", b"You feel cheated", 
+    b"You feel inflexible", b"You feel gnarly", b"Your stomach stings painfully",
+    b"Your eyes sting for a second", b"You feel shocked", b"You feel tired", 
+    b"You feel shaken", b"You suddenly hate the thought of jumping around", 
+    b"You are growing a wart", b"You feel reserved", b"You are getting shaky", 
+    b"Thinking seems to get tougher", b"You are getting out of touch with everything", 
+    b"You seem to get less perceptive", b"Your muscles soften", b"It seems that you are getting a cold", 
+    b"You feel soft-hearted", b"You feel bad about your", 
+    b"Bah! This liquid is extremely filthy!", b"Urgh! Poison!", b"You age!", b"You feel exhausted", 
+    b"You feel corrupted!", b"A gush of water hits you!", b"Lots of vipers burst out of the pool",
+    b"You are hit by lots of water.", b"You slip and fall in!", b"Suddenly a water elemental rises from the pool!",
+    b"Suddenly your ears start to bleed!", b"The water is suddenly writhing with snakes!",
+    b"You start a trip on the road to nowhere.", b"You feel very very bad.",
+    b"You hear hissing sounds", b"You suddenly hear many hissing sounds!", 
+    b"You suddenly hear roaring waves!", b"You feel very bad off.",
+    b"You suddenly feel like jumping around", b"You feel jumpy",  b"You sense trouble",
+    b"Lots of vipers burst out of the pool."
+)
+
+_NEUTRAL_MESSAGES = (
+    b"Nothing happens.", b"The pool bubbles", b"Great! Pure dwarven ale!", b"Wow! Pure beer!",
+    b"The liquid tastes bitter.", b"While you drink small waves seem to ripple the otherwise calm surface of the pool.",
+    b"Your outfit suddenly looks much cleaner", 
+)
+
+_BAD_MSG_RE = re.compile(b'|'.join(re.escape(m) for m in _BAD_MESSAGES))
+_GOOD_MSG_RE = re.compile(b'|'.join(re.escape(m) for m in _GOOD_MESSAGES))
+_NEUTRAL_MSG_RE = re.compile(b'|'.join(re.escape(m) for m in _NEUTRAL_MESSAGES))
+
+class AnsiStripper:
+    """Incrementally strip ANSI escape sequences from a byte stream.
+
+    Walks each byte once with a small state machine instead of re-scanning
+    the accumulated buffer with a regex on every flush. The state persists
+    across feed() calls, so an escape sequence split between PTY reads is
+    still removed correctly.
+    """
+
+    NORMAL, ESC, CSI, CHARSET, OSC, OSC_ESC = range(6)
+
+    def __init__(self):
+        self.state = self.NORMAL
+
+    def feed(self, data):
+        """Return the printable bytes of data with escape sequences removed."""
+        out = bytearray()
+        state = self.state
+        for byte in data:
+            if state == self.NORMAL:
+                if byte == 0x1B:
+                    state = self.ESC
+                else:
+                    out.append(byte)
+            elif state == self.ESC:
+                if byte == 0x5B:  # '[' starts a CSI sequence
+                    state = self.CSI
+                elif byte == 0x28:  # '(' selects a charset, one argument byte
+                    state = self.CHARSET
+                elif byte == 0x5D:  # ']' starts an OSC string
+                    state = self.OSC
+                else:
+                    state = self.NORMAL
+            elif state == self.CSI:
+                # Parameter and intermediate bytes are consumed silently;
+                # a final byte in @-~ ends the sequence
+                if 0x40 <= byte <= 0x7E:
+                    state = self.NORMAL
+            elif state == self.OSC:
+                # An OSC string runs until BEL or the ST terminator "ESC \"
+                if byte == 0x07:
+                    state = self.NORMAL
+                elif byte == 0x1B:
+                    state = self.OSC_ESC
+            elif state == self.OSC_ESC:
+                state = self.NORMAL if byte == 0x5C else self.OSC
+            else:  # CHARSET
+                state = self.NORMAL
+        self.state = state
+        return out
 
 def main():
+    # Configure logging with timestamp in the filename
+    log_file_path = 'adom_log_{}.log'.format(datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
+    logging.basicConfig(filename=log_file_path, level=logging.DEBUG)
+
     adom_path = os.getenv('ADOM_PATH')
     home_dir = os.getenv('ADOM_HOME', os.getenv('HOME'))
-    output_buffer = ""  # Create a buffer for the game output
-    last_callback_time = time()  # Initialize the last callback time
+    output_buffer = bytearray()  # Create a buffer for the game output
     saved_games_dir = os.path.join(home_dir, '.adom.data/savedg')
     backup_dir_base = os.path.join(home_dir, '.adompy.data')
 
@@ -123,7 +286,14 @@ def main():
         return
 
     old_settings = termios.tcgetattr(sys.stdin)
-    
+    stdout_fd = sys.stdout.fileno()
+
+    # Join the save/backup paths once instead of on every restart below
+    if game_name_to_load:
+        save_file_path = os.path.join(saved_games_dir, game_filename)
+        backup_file_path = os.path.join(backup_dir_base, game_filename)
+
+
     state = {
         'save_sequence': False,
         'quit_sequence': False,
@@ -136,10 +306,11 @@ def main():
     while state['restart']:
         state['restart'] = False
         state['start_sequence'] = True
+        epoll = None
 
         # Restore game file from backup if it's not in the saved games directory
         if game_name_to_load and game_filename not in os.listdir(saved_games_dir):
-            shutil.copyfile(os.path.join(backup_dir_base, game_filename), os.path.join(saved_games_dir, game_filename))
+            copy_file(backup_file_path, save_file_path)
 
         try:
             master_fd, slave_fd = pty.openpty()
@@ -148,246 +319,226 @@ def main():
 
             tty.setraw(sys.stdin.fileno())
 
-            # Launch ADOM with the game name as an argument if loading a game
-            adom_args = [adom_path if adom_path else 'adom']
+            # Launch ADOM with the game name as an argument if loading a game;
+            # adom_path was already defaulted above
             if game_name_to_load:
-                adom_args += ["-l", game_name_to_load]  # Correctly include "-l" argument
+                adom_args = (adom_path, '-l', game_name_to_load)
 
                 # Backup the game file before loading it
-                shutil.copyfile(os.path.join(saved_games_dir, game_filename), os.path.join(backup_dir_base, game_filename))
+                copy_file(save_file_path, backup_file_path)
+            else:
+                adom_args = (adom_path,)
 
             adom_proc = subprocess.Popen(adom_args, preexec_fn=os.setsid, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, close_fds=True)
 
             def callback(output, state):
                 """Callback function to be called when the timeout happens."""
-                # Strip ANSI sequences and "\x1b(B" sequences from the output using a more concise regular expression
-                ansi_escape = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]|\x1b\(B')
-                stripped_output = ansi_escape.sub('', output)
-                # Trim the entire string
-                trimmed_output = stripped_output.strip()
-                logging.info("Callback called with output: {}".format(ascii(trimmed_output)))
+                # The buffer was already stripped of escape sequences on the way in
+                trimmed_output = output.strip()
+                # A burst of pure escapes (cursor moves, color resets) strips down
+                # to nothing; skip all the prompt matching in that case
+                if not trimmed_output:
+                    return
+                # ascii() over the whole buffer is expensive; only build it if the
+                # record would actually be emitted
+                if _logger.isEnabledFor(logging.INFO):
+                    _logger.info("Callback called with output: %s", ascii(trimmed_output[-200:]))
 
                 if state['start_sequence']:
                     # Send "P" keys when the string ends with "--- Play the Game --- Credits ---"
-                    if trimmed_output.endswith("--- Play the Game --- Credits ---"):
-                        logging.info("Sending 'P' key to start the game")
-                        os.write(master_fd, b'P')
+                    if trimmed_output.endswith(b"--- Play the Game --- Credits ---"):
+                        _logger.info("Sending 'P' key to start the game")
+                        write_all(master_fd, b'P')
                         return
 
-                    # Close the game ad on start
-                    exit_key_match = re.search(r'-+ \[\+\-\] Page up/down -- \[\*\_\] Line up/down -- \[(\w)\] Exit -+', trimmed_output)
-                    if exit_key_match:
-                        logging.info("Sending '{}' key to close the ad on start".format(exit_key_match.group(1)))
-                        exit_key_code = exit_key_match.group(1)
-                        os.write(master_fd, exit_key_code.encode())
+                    # Close the game ad on start. The footer is a fixed shape around one
+                    # "[X]" slot, so a literal rfind extracts the key without the regex;
+                    # the regex only runs as a fallback when the cheap scan misses.
+                    exit_key_code = None
+                    idx = trimmed_output.rfind(b'] Exit')
+                    if idx > 2 and trimmed_output[idx - 2:idx - 1] == b'[':
+                        exit_key_code = trimmed_output[idx - 1:idx]
+                    else:
+                        exit_key_match = _EXIT_KEY_RE.search(trimmed_output)
+                        if exit_key_match:
+                            exit_key_code = exit_key_match.group(1)
+                    if exit_key_code:
+                        _logger.info("Sending %s key to close the ad on start", exit_key_code)
+                        write_all(master_fd, exit_key_code)
                         state['start_sequence'] = False
                         return
 
+                # One scan for all the always-active prompts
+                prompt_match = _PROMPT_RE.search(trimmed_output)
+                prompt = prompt_match.lastgroup if prompt_match else None
+
                 # Start save game process
-                save_game_match = re.search(r'-+Really save the game\? \[y\/N\]', trimmed_output)
-                if save_game_match:
-                    logging.info("Sending 'y' key to save the game")
-                    os.write(master_fd, b'y')
+                if prompt == 'save':
+                    _logger.info("Sending 'y' key to save the game")
+                    write_all(master_fd, b'y')
                     state['save_sequence'] = True
                     return
-                
+
                 if state['save_sequence']:
-                    logging.info("Checking for save game messages")
+                    _logger.info("Checking for save game messages")
                     
-                    press_space_match = re.search(r'\[Press SPACE to continue\]', trimmed_output)
+                    press_space_match = _PRESS_SPACE_RE.search(trimmed_output)
                     if press_space_match:
-                        logging.info("Sending ' ' key to continue")
-                        os.write(master_fd, b' ')
+                        _logger.info("Sending ' ' key to continue")
+                        write_all(master_fd, b' ')
                         return
 
-                    quit_game_match = re.search(r'\[c\] read the credits or\[q\] quit the game\?Your choice:', trimmed_output)
+                    quit_game_match = _CREDITS_QUIT_RE.search(trimmed_output)
                     if quit_game_match:
-                        logging.info("Sending 'q' key to quit the game")
-                        os.write(master_fd, b'q')
+                        _logger.info("Sending 'q' key to quit the game")
+                        write_all(master_fd, b'q')
                         state['save_sequence'] = False
                         return
 
                     return
 
                 # Message: "Really quit the game? [y/N]"
-                quit_game_match = re.search(r'Really quit the game\? \[y\/N\]', trimmed_output)
-                if quit_game_match:
-                    logging.info("Sending 'y' key to quit the game")
-                    os.write(master_fd, b'y')
+                if prompt == 'quit':
+                    _logger.info("Sending 'y' key to quit the game")
+                    write_all(master_fd, b'y')
                     state['quit_sequence'] = True
                     return
             
                 if state['quit_sequence']:
-                    logging.info("Checking for quit game messages")
-
-                    # Message: "-- [Zz ] Exit ############\r(more)"
-                    exit_game_match = re.search(r'-- \[Zz \] Exit #+', trimmed_output)
-                    if exit_game_match:
-                        logging.info("Sending 'Z' key to close the screen")
-                        os.write(master_fd, b'Z')
-                        return
-                
-                    # Message: "[e] exit to the main menu or  [q] quit the game?  Your choice:'"
-                    exit_game_match = re.search(r'\[e\] exit to the main menu or  \[q\] quit the game\?  Your choice:', trimmed_output)
-                    if exit_game_match:
-                        logging.info("Sending 'q' key to quit the game")
-                        os.write(master_fd, b'q')
-                        state['quit_sequence'] = False
+                    _logger.info("Checking for quit game messages")
+
+                    quit_match = _QUIT_SEQ_RE.search(trimmed_output)
+                    if quit_match:
+                        matched = quit_match.group(0)
+                        if matched.startswith(b'--'):
+                            # Message: "-- [Zz ] Exit ############\r(more)"
+                            _logger.info("Sending 'Z' key to close the screen")
+                            write_all(master_fd, b'Z')
+                        elif matched.startswith(b'[e]'):
+                            # Message: "[e] exit to the main menu or  [q] quit the game?  Your choice:'"
+                            _logger.info("Sending 'q' key to quit the game")
+                            write_all(master_fd, b'q')
+                            state['quit_sequence'] = False
+                        else:
+                            # Some blocking message with "more" "You sense a certain tension.(more)"
+                            _logger.info("Sending ' ' key to continue")
+                            write_all(master_fd, b' ')
                         return
 
-                if state['quit_sequence']:
-                    # Some blocking message with "more" "You sense a certain tension.(more)"
-                    more_match = re.search(r'\(more\)', trimmed_output)
-                    if more_match:
-                        logging.info("Sending ' ' key to continue")
-                        os.write(master_fd, b' ')
-                        return
-                
                 # Message: "You see a red pool."
-                pool_match = re.search(r'You see a \S+ pool\.', trimmed_output)
-                if pool_match:
+                if prompt == 'pool':
                     if state['drinking_infinite']:
-                        logging.info("Sending 'D' key to drink from the pool")
-                        os.write(master_fd, b'D')
+                        _logger.info("Sending 'D' key to drink from the pool")
+                        write_all(master_fd, b'D')
                         return
-                    else:
-                        # Write at the top of the screen
-                        sys.stdout.write("\033[0;0HYou see a pool. \"D\" for drinking, F12 for infinite drinking. \r\n")
-                        sys.stdout.flush()
-                
+                    # Write at the top of the screen
+                    write_all(stdout_fd, b"\033[0;0HYou see a pool. \"D\" for drinking, F12 for infinite drinking. \r\n")
+                    # The drink prompt can share the screen with the pool message,
+                    # in which case the combined scan stopped at the pool match
+                    if _DRINK_PROMPT_RE.search(trimmed_output, prompt_match.end()):
+                        prompt = 'drink'
+
                 # Message: "-Do you want to drink from the pool? [Y/n]"
-                drink_pool_match = re.search(r'-+Do you want to drink from the pool\? \[Y\/n\]', trimmed_output)
-                if drink_pool_match and game_name_to_load:
-                    logging.info("Sending 'Y' key to drink from the pool")
-                    os.write(master_fd, b'Y')
+                if prompt == 'drink' and game_name_to_load:
+                    _logger.info("Sending 'Y' key to drink from the pool")
+                    write_all(master_fd, b'Y')
                     state['drinking_sequence'] = True
                     return
                 
                 if state['drinking_sequence']:
-                    logging.info("Checking for drinking messages")
-
-                    good_messages = [
-                        "You swallow hard", "You feel hot-headed",
-                        "You feel bold at the thought of danger", "You feel very lucky",
-                        "You feel cool", "You feel lucky", "You are moved by the sheer pleasure of this sip of fluid",
-                        "You feel flexible", "Your digestion calms down", "Your eyes tingle for a second",
-                        "You hear a voice calling you 'Iceberg'", "You feel totally awake",
-                        "You feel very controlled", "Your looks improve", "You feel very self-confident",
-                        "Your movements are getting swifter", "You feel studious",
-                        "You feel more in touch with the world", "Your senses sharpen",
-                        "Your muscles feel stronger", "Your health increases", "Your will seems inflexible",
-                        "You feel great about your", "You feel much better",
-                        "You feel younger!", "You suddenly remember your early youth", 
-                        "You feel slightly strengthened", "Your wounds no longer bleed", 
-                        "Your blood seems to cool down", "You suddenly are visible again",
-                        "No effect, as far as you notice", "You feel steady", "You feel relieved", 
-
-                    ]
-
-                    bad_messages = [
-                        "The pool suddenly dries up.", "You taste bitter bile in your mouth", "You shiver",
-                        "You feel like an endangered species", "You become depressive",
-                        "You continue the trip on the road to nowhere", "You feel elated", "You sweat",
-                        "Your outfit suddenly looks much cleaner", "You suddenly can see yourself",
-                        "You feel dizzy for some seconds", "Suddenly you are gone", "You feel translucent",
-                        "You feel on air", "You suddenly are visible again", "You feel cheated", 
-                        "You feel inflexible", "You feel gnarly", "Your stomach stings painfully",
-                        "Your eyes sting for a second", "You feel shocked", "You feel tired", 
-                        "You feel shaken", "You suddenly hate the thought of jumping around", 
-                        "You are growing a wart", "You feel reserved", "You are getting shaky", 
-                        "Thinking seems to get tougher", "You are getting out of touch with everything", 
-                        "You seem to get less perceptive", "Your muscles soften", "It seems that you are getting a cold", 
-                        "You feel soft-hearted", "You feel bad about your", 
-                        "Bah! This liquid is extremely filthy!", "Urgh! Poison!", "You age!", "You feel exhausted", 
-                        "You feel corrupted!", "A gush of water hits you!", "Lots of vipers burst out of the pool",
-                        "You are hit by lots of water.", "You slip and fall in!", "Suddenly a water elemental rises from the pool!",
-                        "Suddenly your ears start to bleed!", "The water is suddenly writhing with snakes!",
-                        "You start a trip on the road to nowhere.", "You feel very very bad.",
-                        "You hear hissing sounds", "You suddenly hear many hissing sounds!", 
-                        "You suddenly hear roaring waves!", "You feel very bad off.",
-                        "You suddenly feel like jumping around", "You feel jumpy",  "You sense trouble",
-                        "Lots of vipers burst out of the pool."
-                    ]
-
-                    neutral_messages = [
-                        "Nothing happens.", "The pool bubbles", "Great! Pure dwarven ale!", "Wow! Pure beer!",
-                        "The liquid tastes bitter.", "While you drink small waves seem to ripple the otherwise calm surface of the pool.",
-                        "Your outfit suddenly looks much cleaner", 
-                    ]
-
-                    wish_message = "What do you wish for?"
+                    _logger.info("Checking for drinking messages")
 
                     # Check if trimmed_output contains any of the bad messages
-                    for message in bad_messages:
-                        if message in trimmed_output:
-                            os.write(master_fd, b'\n\n\n\n\n\n\n\n\n\n\n\n\nQ')
-                            state['drinking_sequence'] = False
-                            state['quit_sequence'] = True
-                            state['restart'] = True
-                            return
-                    
+                    if _BAD_MSG_RE.search(trimmed_output):
+                        write_all(master_fd, b'\n\n\n\n\n\n\n\n\n\n\n\n\nQ')
+                        state['drinking_sequence'] = False
+                        state['quit_sequence'] = True
+                        state['restart'] = True
+                        return
+
                     # Check if trimmed_output contains any of the good messages
-                    for message in good_messages:
-                        if message in trimmed_output:
-                            os.write(master_fd, b'\nS')
-                            state['drinking_sequence'] = False
-                            state['save_sequence'] = True
-                            state['restart'] = True
-                            return
-                        
+                    if _GOOD_MSG_RE.search(trimmed_output):
+                        write_all(master_fd, b'\nS')
+                        state['drinking_sequence'] = False
+                        state['save_sequence'] = True
+                        state['restart'] = True
+                        return
+
                     # Check if trimmed_output contains any of the neutral messages
-                    for message in neutral_messages:
-                        if message in trimmed_output:
-                            state['drinking_sequence'] = False
-                            if state['drinking_infinite']:
-                                os.write(master_fd, b'D')
-                            return
-                    
-                    if 'A small frog pops up. (more)' in trimmed_output or 'A small frog pops up.(more)' in trimmed_output:
-                        os.write(master_fd, b'    ')
+                    if _NEUTRAL_MSG_RE.search(trimmed_output):
+                        state['drinking_sequence'] = False
                         if state['drinking_infinite']:
-                            os.write(master_fd, b'D')
+                            write_all(master_fd, b'D')
+                        return
+                    
+                    if b'A small frog pops up. (more)' in trimmed_output or b'A small frog pops up.(more)' in trimmed_output:
+                        write_all(master_fd, b'    D' if state['drinking_infinite'] else b'    ')
                         return
 
-                    if wish_message in trimmed_output:
+                    if b"What do you wish for?" in trimmed_output:
                         state['drinking_sequence'] = False
                         return
 
                     state['drinking_sequence'] = False
 
+            stdin_fd = sys.stdin.fileno()
+            stripper = AnsiStripper()
+
+            # Edge-triggered registration for the PTY, whose wakeups drain it
+            # completely instead of one read per poll round. Stdin stays
+            # blocking and level-triggered: O_NONBLOCK lives on the open file
+            # description, which fds 0/1/2 share with the terminal, so setting
+            # it on stdin would silently make the stdout echo non-blocking too.
+            os.set_blocking(master_fd, False)
+            epoll = select.epoll()
+            epoll.register(master_fd, select.EPOLLIN | select.EPOLLET)
+            epoll.register(stdin_fd, select.EPOLLIN)
+
             while adom_proc.poll() is None:
-                r, w, e = select.select([master_fd, sys.stdin], [], [], SELECT_TIMEOUT)
+                events = epoll.poll(SELECT_TIMEOUT)
+                r = [fd for fd, _ in events]
                 if master_fd in r:
-                    output = os.read(master_fd, 1024).decode('utf-8')
-                    output_buffer += output  # Buffer the output
-                    sys.stdout.write(output)
-                    sys.stdout.flush()
-                if sys.stdin in r:
-                    input = os.read(sys.stdin.fileno(), 1024)
-                    logging.info("Input: {}".format(ascii(input)))
-                    if input == b'\x1b[24~':
-                        state['drinking_infinite'] = not state['drinking_infinite']
-                        if state['drinking_infinite']:
-                            sys.stdout.write("\033[0;0HInfinite drinking: {}\n".format(state['drinking_infinite']))
-                            sys.stdout.flush()
-                            os.write(master_fd, b'D')
-                    else:
-                        os.write(master_fd, input)
+                    while True:
+                        try:
+                            n = os.readv(master_fd, [_PTY_READ_BUF])
+                        except BlockingIOError:
+                            break
+                        if n <= 0:
+                            break
+                        chunk = _PTY_READ_BUF[:n]
+                        output_buffer.extend(stripper.feed(chunk))  # Buffer the stripped output
+                        # All prompts are matched near the end of the buffer, so only
+                        # the tail needs to be retained between flushes
+                        if len(output_buffer) > 4096:
+                            del output_buffer[:-4096]
+                        write_all(stdout_fd, chunk)  # Echo the raw bytes as-is
+                if stdin_fd in r:
+                    # One blocking read per wakeup; level-triggered epoll
+                    # re-reports stdin immediately if a paste left more behind
+                    n = os.readv(stdin_fd, [_STDIN_READ_BUF])
+                    if n > 0:
+                        input = _STDIN_READ_BUF[:n]
+                        if _logger.isEnabledFor(logging.INFO):
+                            _logger.info("Input: %s", ascii(bytes(input)))
+                        if input == b'\x1b[24~':
+                            state['drinking_infinite'] = not state['drinking_infinite']
+                            if state['drinking_infinite']:
+                                write_all(stdout_fd, b"\033[0;0HInfinite drinking: True\n")
+                                write_all(master_fd, b'D')
+                        else:
+                            write_all(master_fd, input)
 
-                # If the timeout has happened and there is output, call the callback function and flush the buffer
-                if time() - last_callback_time > TIMEOUT and output_buffer:
-                    callback(output_buffer, state)
-                    output_buffer = ""
-                    last_callback_time = time()
+                # The poll timing out means the game went quiet; flush the buffer then
+                if not events and output_buffer:
+                    callback(bytes(output_buffer), state)
+                    output_buffer.clear()
 
             # Backup the game file after quitting
-            if game_name_to_load:
-                filepath = os.path.join(saved_games_dir, game_filename)
-                if os.path.isfile(filepath):
-                    shutil.copyfile(filepath, os.path.join(backup_dir_base, game_filename))
+            if game_name_to_load and os.path.isfile(save_file_path):
+                copy_file(save_file_path, backup_file_path)
 
         except Exception as e:
-            logging.error("An error occurred: {}".format(e))
+            _logger.error("An error occurred: %s", e)
 
             termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
             traceback.print_exc()
@@ -395,6 +546,9 @@ def main():
             state['error'] = True
         finally:
             termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+            if epoll is not None:
+                epoll.close()
+                epoll = None
             os.close(master_fd)
             os.close(slave_fd)
 